@@ -12,316 +12,658 @@ or https://github.com/FigueroaAC/GPs-for-SpentFuel
 
 __all__ = ["Kernel"]
 
+import math
+
 import numpy as np
 from scipy.spatial.distance import cdist
 
+try:
+    import numba
+except ImportError:
+    # numba is optional, without it all kernels are evaluated with NumPy.
+    numba = None
+
+def _jit(function):
+    """Compile function with numba, or return None if it is unavailable."""
+    if numba is None:
+        return None
+    return numba.njit(parallel=True, fastmath=True, cache=True)(function)
+
+@_jit
+def _sqe_core(X1, X2, sig2, ls2, out):
+    """Fill out with the SQE kernel without the noise term, shape (n1, n2)."""
+    n1, d = X1.shape
+    n2 = X2.shape[0]
+    for i in numba.prange(n1):
+        for j in range(n2):
+            sqdist = 0.
+            for k in range(d):
+                t = X1[i,k] - X2[j,k]
+                sqdist += t*t
+            out[i,j] = sig2 * math.exp(-0.5*sqdist/ls2)
+
+@_jit
+def _lap_core(X1, X2, sig2, ls, out):
+    """Fill out with the LAP kernel without the noise term, shape (n1, n2)."""
+    n1, d = X1.shape
+    n2 = X2.shape[0]
+    for i in numba.prange(n1):
+        for j in range(n2):
+            sqdist = 0.
+            for k in range(d):
+                t = X1[i,k] - X2[j,k]
+                sqdist += t*t
+            out[i,j] = sig2 * math.exp(-0.5*math.sqrt(sqdist)/ls)
+
+@_jit
+def _cauchy_core(X1, X2, ls2, out):
+    """Fill out with the Cauchy kernel without the noise term, shape (n2, n1).
+    """
+    n1, d = X1.shape
+    n2 = X2.shape[0]
+    for j in numba.prange(n2):
+        for i in range(n1):
+            sqdist = 0.
+            for k in range(d):
+                t = X1[i,k] - X2[j,k]
+                sqdist += t*t
+            out[j,i] = 1. / (1.+sqdist/ls2)
+
+@_jit
+def _srq_core(X1, X2, inv_ls, alpha, out):
+    """Fill out with the base 1 + sqdist/alpha of the SRQ kernel, shape
+    (n2, n1).
+    """
+    n1, d = X1.shape
+    n2 = X2.shape[0]
+    for j in numba.prange(n2):
+        for i in range(n1):
+            sqdist = 0.
+            for k in range(d):
+                t = (X1[i,k] - X2[j,k]) * inv_ls[k]
+                sqdist += t*t
+            out[j,i] = 1. + sqdist/alpha
+
+def _pairwise_sqdist(X1, X2):
+    """Squared euclidean distances between the rows of X1 and X2.
+
+    Uses |x1|^2 + |x2|^2 - 2 x1.x2 with a single matrix product that is
+    updated in place.
+    """
+    sqdist = np.empty((X1.shape[0], X2.shape[0]))
+    np.dot(X1, X2.T, out=sqdist)
+    sqdist *= -2
+    norm1 = np.einsum('ij,ij->i', X1, X1)
+    norm2 = norm1 if X1 is X2 else np.einsum('ij,ij->i', X2, X2)
+    sqdist += norm1[:,None]
+    sqdist += norm2[None,:]
+    return sqdist
+
+def _transposed_cdist(X1, X2, metric):
+    """Distances in the (len(X2), len(X1)) layout.
+
+    Equivalent to cdist(X1, X2, metric).T, but the arguments are swapped
+    instead of transposing the result, which yields a C-contiguous array.
+    A single row of X1 is the exception: cdist has a noticeable overhead
+    per row of its first argument, and the transpose of the (1, len(X2))
+    result is contiguous as well.
+    """
+    if X1.shape[0] == 1:
+        return cdist(X1, X2, metric=metric).T
+    return cdist(X2, X1, metric=metric)
+
+def _sqeuclidean_cdist(X1, X2):
+    """Squared euclidean distances in the (len(X2), len(X1)) layout."""
+    return _transposed_cdist(X1, X2, 'sqeuclidean')
+
+def _add_noise(K, noise, n):
+    """Add noise**2 times the n x n identity to K, in place if possible.
+
+    For a square K, only the diagonal is updated instead of adding a full
+    identity matrix. If n equals one, the identity broadcasts to all
+    elements of K.
+    """
+    noise2 = noise**2
+    if n == 1:
+        K += noise2
+    elif K.shape == (n, n):
+        K.flat[::n+1] += noise2
+    else:
+        K = K + noise2*np.eye(n)
+    return K
+
+def _noise_gradient(noise, n):
+    """Gradient of the noise term, 2*noise times the n x n identity."""
+    gradient = np.zeros((n, n))
+    gradient.flat[::n+1] = 2*noise
+    return gradient
+
+def _feature_differences(X1, X2):
+    """Differences of all pairs of rows of X1 and X2, for each feature.
+
+    The result has the shape (n_features, len(X1), len(X2)), such that
+    the differences of feature i are the contiguous block [i].
+    """
+    diff = np.empty((X1.shape[1], X1.shape[0], X2.shape[0]))
+    # Filling one feature at a time is faster than a three-dimensional
+    # broadcast, which is bandwidth-bound for large inputs.
+    for i in range(X1.shape[1]):
+        np.subtract.outer(X1[:,i], X2[:,i], out=diff[i])
+    return diff
+
+def _sqe(X1, X2, params):
+    """Squared exponential kernel."""
+    p = params[0]
+    if _sqe_core is not None:
+        K = np.empty((X1.shape[0], X2.shape[0]))
+        _sqe_core(X1, X2, p[0]**2, p[1]**2, K)
+        return _add_noise(K, p[-1], X1.shape[0])
+    # The squared distances are not needed afterwards, hence K is
+    # calculated in their place.
+    K = _pairwise_sqdist(X1, X2)
+    K *= -0.5/p[1]**2
+    np.exp(K, out=K)
+    K *= p[0]**2
+    return _add_noise(K, p[-1], X1.shape[0])
+
+def _sqe_gradient(X1, X2, params):
+    """Squared exponential kernel and its gradient."""
+    p = params[0]
+    sqdist = _pairwise_sqdist(X1, X2)
+    K = np.multiply(sqdist, -0.5/p[1]**2)
+    np.exp(K, out=K)
+    K *= p[0]**2
+    K = _add_noise(K, p[-1], X1.shape[0])
+    gradients = [2*p[0]*K,np.multiply(sqdist/(p[1]**3),K),
+                 _noise_gradient(p[-1], X1.shape[0])]
+    return K, gradients
+
+def _asqe(X1, X2, params):
+    """Anisotropic squared exponential kernel."""
+    p = params[0]
+    length_scales = 1/p[1:-1]
+    X1 = X1*length_scales
+    X2 = X2*length_scales
+    K = _sqeuclidean_cdist(X1, X2)
+    K *= -0.5
+    np.exp(K, out=K)
+    K *= p[0]**2
+    return _add_noise(K, p[-1], X1.shape[0])
+
+def _asqe_gradient(X1, X2, params):
+    """Anisotropic squared exponential kernel and its gradient."""
+    p = params[0]
+    K = _asqe(X1, X2, params)
+    length_scales = 1/p[1:-1]
+    X1 = X1*length_scales
+    X2 = X2*length_scales
+    g = _feature_differences(X1, X2)
+    np.square(g, out=g)
+    g /= p[1:X1.shape[1]+1,None,None]
+    gradients = [np.multiply(g[i],K) for i in range(X1.shape[1])]
+    gradients = [2*p[0]*K] + gradients + [_noise_gradient(p[-1], X1.shape[0])]
+    return K, gradients
+
+def _lap(X1, X2, params):
+    """Laplacian kernel."""
+    p = params[0]
+    if _lap_core is not None:
+        K = np.empty((X1.shape[0], X2.shape[0]))
+        _lap_core(X1, X2, p[0]**2, p[1], K)
+        return _add_noise(K, p[-1], X1.shape[0])
+    # Clamp at zero: rounding errors can make the squared distance of
+    # (nearly) identical points slightly negative.
+    K = _pairwise_sqdist(X1, X2)
+    np.maximum(K, 0, out=K)
+    np.sqrt(K, out=K)
+    K *= -0.5/p[1]
+    np.exp(K, out=K)
+    K *= p[0]**2
+    return _add_noise(K, p[-1], X1.shape[0])
+
+def _lap_gradient(X1, X2, params):
+    """Laplacian kernel and its gradient."""
+    p = params[0]
+    dist = _pairwise_sqdist(X1, X2)
+    np.maximum(dist, 0, out=dist)
+    np.sqrt(dist, out=dist)
+    K = np.multiply(dist, -0.5/p[1])
+    np.exp(K, out=K)
+    K *= p[0]**2
+    K = _add_noise(K, p[-1], X1.shape[0])
+    gradients = [2*p[0]*K,np.multiply(dist/(p[1]**2),K),
+                 _noise_gradient(p[-1], X1.shape[0])]
+    return K, gradients
+
+def _alap(X1, X2, params):
+    """Anisotropic Laplacian kernel."""
+    p = params[0]
+    X1 = X1/p[1:-1]
+    X2 = X2/p[1:-1]
+    # The kernel uses the square root of the euclidean distance, i.e., the
+    # fourth root of the squared distance, as the trained kernels do. A
+    # single sqrt on top of the euclidean cdist is faster than **0.25.
+    K = _transposed_cdist(X1, X2, 'euclidean')
+    np.sqrt(K, out=K)
+    K *= -0.5
+    np.exp(K, out=K)
+    K *= p[0]**2
+    return _add_noise(K, p[-1], X1.shape[0])
+
+def _alap_gradient(X1, X2, params):
+    """Anisotropic Laplacian kernel and its gradient."""
+    p = params[0]
+    K = _alap(X1, X2, params)
+    X1 = X1/p[1:-1]
+    X2 = X2/p[1:-1]
+    g = _feature_differences(X1, X2)
+    np.abs(g, out=g)
+    g /= p[1:X1.shape[1]+1,None,None]
+    gradients = [np.multiply(g[i],K) for i in range(X1.shape[1])]
+    gradients = [2*p[0]*K] + gradients + [_noise_gradient(p[-1], X1.shape[0])]
+    return K, gradients
+
+def _linear(X1, X2, params):
+    """Linear kernel with one lengthscale per feature."""
+    p = params[0]
+    # This is a version of Linear modified to include lengthscales for each
+    # Input Variable
+    # =========================================================================
+    #     K = a*X.Y+b
+    # =========================================================================
+    length_scales = 1/p[2:-1]
+    X1 = X1*length_scales
+    X2 = X2*length_scales
+    K = (p[0]*np.dot(X1,X2.T).T)+p[1]
+    return _add_noise(K, p[-1], X1.shape[0])
+
+def _linear_gradient(X1, X2, params):
+    """Linear kernel and its gradient."""
+    p = params[0]
+    length_scales = 1/p[2:-1]
+    X1 = X1*length_scales
+    X2 = X2*length_scales
+    B = np.dot(X1,X2.T)
+    K = (p[0]*B.T)+p[1]
+    K = _add_noise(K, p[-1], X1.shape[0])
+
+    # Outer products of the individual features, transposed like K.
+    outer = np.einsum('ni,mi->imn', X1, X2)
+    gradients = [B.T] + [np.eye(K.shape[0])] + [2*p[0]*\
+                                               outer[i]/p[i]\
+                                               for i in range(X1.shape[1])]
+    gradients = gradients + [_noise_gradient(p[-1], X1.shape[0])]
+    return K, gradients
+
+def _poly(X1, X2, params):
+    """Polynomial kernel."""
+    p = params[0]
+    # =========================================================================
+    #     K = (a*(X.Y)+b)**c
+    # =========================================================================
+    length_scales = 1/p[3:-1]
+    X1 = X1*length_scales
+    X2 = X2*length_scales
+    K = np.dot(X1,X2.T).T
+    K *= p[0]
+    K += p[1]
+    np.power(K, p[2], out=K)
+    return _add_noise(K, p[-1], X1.shape[0])
+
+def _poly_gradient(X1, X2, params):
+    """Polynomial kernel and its gradient."""
+    p = params[0]
+    length_scales = 1/p[3:-1]
+    X1 = X1*length_scales
+    X2 = X2*length_scales
+    B = np.dot(X1,X2.T)
+    base = (p[0]*B)+p[1]
+    # base**c is calculated as base*base**(c-1) such that the second factor
+    # can be reused for the gradient.
+    base_cm1 = np.power(base, p[2]-1)
+    K = (base*base_cm1).T
+    K = _add_noise(K, p[-1], X1.shape[0])
+
+    db = base_cm1
+    db *= p[2]
+    da = np.multiply(B,db)
+    dc = np.multiply(K,np.log(base, out=base))
+    outer = np.einsum('ni,mi->inm', X1, X2)
+    gradients = [da,db,dc]+\
+        [2*p[0]*np.multiply(outer[i]/p[i],db) \
+         for i in range(X1.shape[1])]
+    gradients = gradients + [_noise_gradient(p[-1], X1.shape[0])]
+    return K, gradients
+
+def _anova_sqdists(X1, X2):
+    """Squared distances of X, X**2 and X**3 used by the Anova kernel."""
+    X1_sq = X1*X1
+    X2_sq = X2*X2
+    return [cdist(X1, X2, metric='sqeuclidean'),
+            cdist(X1_sq, X2_sq, metric='sqeuclidean'),
+            cdist(X1_sq*X1, X2_sq*X2, metric='sqeuclidean')]
+
+def _anova(X1, X2, params):
+    """ANOVA kernel."""
+    p = params[0]
+    # This isn't working, probably some parameters for lengthscales are needed for each dimension
+    K = sum(np.exp((-p[0]*sqdist)**p[1])
+            for sqdist in _anova_sqdists(X1, X2)) # Not working
+    return _add_noise(K, p[-1], X1.shape[0])
+
+def _anova_gradient(X1, X2, params):
+    """ANOVA kernel and its gradient."""
+    p = params[0]
+    # The distances of X, X**2 and X**3 are shared by the kernel and the
+    # gradient.
+    sqdists = _anova_sqdists(X1, X2)
+    bases = [-p[0]*sqdist for sqdist in sqdists]
+    K = np.exp(bases[0]**p[1]) +\
+        np.exp(bases[1]**p[1]) +\
+        np.exp(bases[2]**p[1])
+    K = _add_noise(K, p[-1], X1.shape[0])
+    dd = p[1] * (np.exp(bases[0]**(p[1]-1)) +
+                         np.exp(bases[1]**(p[1]-1)) +
+                         np.exp(bases[2]**(p[1]-1)))
+    gradients = [-np.multiply(sqdist,dd) for sqdist in sqdists] +\
+        [dd, _noise_gradient(p[-1], X1.shape[0])]
+    return K, gradients
+
+def _sigmoid(X1, X2, params):
+    """Sigmoid (hyperbolic tangent) kernel."""
+    p = params[0]
+    # This is not a positive semidefinite Kernel. Some tweaking has to be done
+    # to make this work. Probably along the lines of KdotK.T
+    # This isn't working, probably some parameters for lengthscales are needed for each dimension
+    K = np.dot(X1,X2.T)
+    K *= p[0]
+    K += p[1]
+    np.tanh(K, out=K)
+    return _add_noise(K, p[-1], X1.shape[0])
+
+def _sigmoid_gradient(X1, X2, params):
+    """Sigmoid kernel and its gradient."""
+    p = params[0]
+    B = np.dot(X1,X2.T)
+    arg = p[0]*B + p[1]
+    K = np.tanh(arg)
+    K = _add_noise(K, p[-1], X1.shape[0])
+    sech2 = 1/(np.cosh(arg)**2)
+    gradients = [np.multiply(B,sech2),sech2,
+                 _noise_gradient(p[-1], X1.shape[0]) ]
+    return K, gradients
+
+def _rq(X1, X2, params):
+    """Rational quadratic kernel."""
+    p = params[0]
+    length_scales = 1/p[1:-1]
+    X1 = X1*length_scales
+    X2 = X2*length_scales
+    sqdist = _sqeuclidean_cdist(X1, X2)
+    K = sqdist + p[0]**2
+    np.divide(sqdist, K, out=K)
+    np.subtract(1, K, out=K)
+    return _add_noise(K, p[-1], X1.shape[0])
+
+def _rq_gradient(X1, X2, params):
+    """Rational quadratic kernel and its gradient."""
+    p = params[0]
+    length_scales = 1/p[1:-1]
+    X1 = X1*length_scales
+    X2 = X2*length_scales
+    sqdist = _sqeuclidean_cdist(X1, X2)
+    shifted_sqdist = sqdist + p[0]**2
+    K = np.divide(sqdist, shifted_sqdist)
+    np.subtract(1, K, out=K)
+    K = _add_noise(K, p[-1], X1.shape[0])
+
+    denom = np.square(shifted_sqdist, out=shifted_sqdist)
+    np.reciprocal(denom, out=denom)
+    g = _feature_differences(X1, X2)
+    np.square(g, out=g)
+    g /= p[1:X1.shape[1]+1,None,None]
+    gradients = [-2*denom*g[i]*p[0]**2 for i in range(X1.shape[1])]
+    gradients = [2*p[0]*sqdist*denom] + gradients +\
+        [_noise_gradient(p[-1], X1.shape[0])]
+    return K, gradients
+
+def _srq(X1, X2, params):
+    """Scaled rational quadratic kernel."""
+    p = params[0]
+    # Only the first n_features parameters are used as lengthscales.
+    length_scales = 1/p[:X1.shape[1]]
+    if _srq_core is not None:
+        K = np.empty((X2.shape[0], X1.shape[0]))
+        _srq_core(X1, X2, length_scales, p[-1], K)
+        # NumPy's vectorised power is faster than calling pow per element.
+        return np.power(K, -p[-1], out=K)
+    X1 = X1*length_scales
+    X2 = X2*length_scales
+    # As in the Cauchy kernel, K is calculated in place of the distances.
+    K = _sqeuclidean_cdist(X1, X2)
+    K /= p[-1]
+    K += 1
+    return np.power(K, -p[-1], out=K)
+
+def _multi_quad(X1, X2, params):
+    """Multiquadric kernel."""
+    p = params[0]
+    # This Kernel is not positive semidefinite so a lot of tweaking would
+    # have to be done to make this work. Maybe take some product of KdotK.T
+    length_scales = 1/p[1:-1]
+    X1 = X1*length_scales
+    X2 = X2*length_scales
+    K = _sqeuclidean_cdist(X1, X2)
+    K += p[0]**2
+    np.sqrt(K, out=K)
+    return _add_noise(K, p[-1], X1.shape[0])
+
+def _multi_quad_gradient(X1, X2, params):
+    """Multiquadric kernel and its gradient."""
+    p = params[0]
+    K = _multi_quad(X1, X2, params)
+    length_scales = 1/p[1:-1]
+    X1 = X1*length_scales
+    X2 = X2*length_scales
+    g = _feature_differences(X1, X2)
+    np.square(g, out=g)
+    g /= p[1:X1.shape[1]+1,None,None]
+    gradients = [np.multiply(g[i],1/K) for i in range(X1.shape[1])]
+    gradients = [p[0]/K] + gradients +\
+        [_noise_gradient(p[-1], X1.shape[0])]
+    return K, gradients
+
+def _inv_multi_quad(X1, X2, params):
+    """Inverse multiquadric kernel."""
+    p = params[0]
+    length_scales = 1/p[1:-1]
+    X1 = X1*length_scales
+    X2 = X2*length_scales
+    K = _sqeuclidean_cdist(X1, X2)
+    K += p[0]**2
+    np.sqrt(K, out=K)
+    np.reciprocal(K, out=K)
+    return _add_noise(K, p[-1], X1.shape[0])
+
+def _inv_multi_quad_gradient(X1, X2, params):
+    """Inverse multiquadric kernel and its gradient."""
+    p = params[0]
+    K = _inv_multi_quad(X1, X2, params)
+    length_scales = 1/p[1:-1]
+    X1 = X1*length_scales
+    X2 = X2*length_scales
+    g = _feature_differences(X1, X2)
+    np.square(g, out=g)
+    g /= p[1:X1.shape[1]+1,None,None]
+    K_cubed = K**3
+    gradients = [-np.multiply(g[i],K_cubed) for i in range(X1.shape[1])]
+    gradients = [-p[0]*K_cubed] +  gradients +\
+        [_noise_gradient(p[-1], X1.shape[0])]
+    return K, gradients
+
+def _wave(X1, X2, params):
+    """Wave kernel."""
+    p = params[0]
+    dist = cdist(X1 , X2, metric='euclidean')
+    K = ((p[0]/dist) * np.sin(dist/p[0]))
+    return _add_noise(K, p[-1], X1.shape[0])
+
+def _wave_gradient(X1, X2, params):
+    """Wave kernel and its gradient."""
+    p = params[0]
+    dist = cdist(X1 , X2, metric='euclidean')
+    arg = dist/p[0]
+    sin_arg = np.sin(arg)
+    K = np.divide(p[0], dist)
+    K *= sin_arg
+    K = _add_noise(K, p[-1], X1.shape[0])
+    grad = np.cos(arg)
+    grad /= -p[0]**2
+    grad += sin_arg
+    grad /= dist
+    gradients = [grad, _noise_gradient(p[-1], X1.shape[0])]
+    return K, gradients
+
+def _power(X1, X2, params):
+    """Power kernel."""
+    p = params[0]
+    K = cdist(X1/p[1:-1],X2/p[1:-1], metric='euclidean')**p[0]
+    return _add_noise(K, p[-1], X1.shape[0])
+
+def _power_gradient(X1, X2, params):
+    """Power kernel and its gradient."""
+    p = params[0]
+    K = _power(X1, X2, params)
+    X1 = X1/p[1:-1]
+    X2 = X2/p[1:-1]
+    dd = p[0] * cdist(X1, X2, metric='euclidean')**(p[0]-1)
+    g = _feature_differences(X1, X2)
+    np.square(g, out=g)
+    g /= p[1:X1.shape[1]+1,None,None]
+    gradients = [np.multiply(g[i],dd) for i in range(X1.shape[1])]
+    gradients = [dd] +  gradients + [_noise_gradient(p[-1], X1.shape[0])]
+    return K, gradients
+
+def _log(X1, X2, params):
+    """Logarithmic kernel."""
+    p = params[0]
+    # This is a non positive definite Kernel
+    dist = cdist(X1 , X2, metric='euclidean').T
+    K = -np.log((dist**p[0]) + 1)
+    return _add_noise(K, p[-1], X1.shape[0])
+
+def _log_gradient(X1, X2, params):
+    """Logarithmic kernel and its gradient."""
+    p = params[0]
+    dist = cdist(X1 , X2, metric='euclidean').T
+    arg = dist**p[0]
+    denom = arg + 1
+    K = np.log(denom)
+    np.negative(K, out=K)
+    K = _add_noise(K, p[-1], X1.shape[0])
+    grad = np.log(dist)
+    grad *= arg
+    grad /= denom
+    gradients = [grad, _noise_gradient(p[-1], X1.shape[0])]
+    return K, gradients
+
+def _cauchy(X1, X2, params):
+    """Cauchy kernel."""
+    p = params[0]
+    # This works very nice and fast
+    if _cauchy_core is not None:
+        K = np.empty((X2.shape[0], X1.shape[0]))
+        _cauchy_core(X1, X2, p[0]**2, K)
+        return _add_noise(K, p[-1], X1.shape[0])
+    # The squared distances are not needed afterwards, hence K is
+    # calculated in their place.
+    K = _sqeuclidean_cdist(X1, X2)
+    K /= p[0]**2
+    K += 1
+    np.reciprocal(K, out=K)
+    return _add_noise(K, p[-1], X1.shape[0])
+
+def _cauchy_gradient(X1, X2, params):
+    """Cauchy kernel and its gradient."""
+    p = params[0]
+    sqdist = _sqeuclidean_cdist(X1, X2)
+    # 1/(1+d^2/l^2) = l^2/(l^2+d^2), so K and the gradient share the
+    # denominator l^2+d^2.
+    denom = np.add(sqdist, p[0]**2)
+    np.reciprocal(denom, out=denom)
+    K = np.multiply(denom, p[0]**2)
+    K = _add_noise(K, p[-1], X1.shape[0])
+    np.square(denom, out=denom)
+    denom *= sqdist
+    gradients = [denom, _noise_gradient(p[-1], X1.shape[0])]
+    return K, gradients
+
+def _tstudent(X1, X2, params):
+    """Student-t kernel."""
+    p = params[0]
+    # This isn't working at the moment
+    # Only the first n_features parameters are used as lengthscales.
+    length_scales = 1/p[1:X1.shape[1]+1]
+    X1 = X1*length_scales
+    X2 = X2*length_scales
+    sqdist = cdist(X1 , X2, metric='euclidean').T
+    K = 1/(1+(sqdist**p[0]))
+    return _add_noise(K, p[-1], X1.shape[0])
+
+def _tstudent_gradient(X1, X2, params):
+    """Student-t kernel and its gradient."""
+    p = params[0]
+    length_scales = 1/p[1:X1.shape[1]+1]
+    X1 = X1*length_scales
+    X2 = X2*length_scales
+    sqdist = cdist(X1 , X2, metric='euclidean').T
+    sqdist_p = sqdist**p[0]
+    K = 1/(1+sqdist_p)
+    K = _add_noise(K, p[-1], X1.shape[0])
+    K_sq = K*K
+    da = -sqdist_p*np.log(sqdist)*K_sq
+    arg = (sqdist**(p[0]-2))*K_sq
+    g = _feature_differences(X1, X2)
+    np.square(g, out=g)
+    g /= p[1:X1.shape[1]+1,None,None]
+    gradients =  [da] + [p[0]*np.multiply(g[i],arg)
+                         for i in range(X1.shape[1])] +\
+        [_noise_gradient(p[-1], X1.shape[0])]
+    return K, gradients
+
+# Kernel functions without and with gradient for each kernel type.
+_KERNEL_DISPATCH = {
+    'SQE': (_sqe, _sqe_gradient),
+    'ASQE': (_asqe, _asqe_gradient),
+    'LAP': (_lap, _lap_gradient),
+    'ALAP': (_alap, _alap_gradient),
+    'Linear': (_linear, _linear_gradient),
+    'Poly': (_poly, _poly_gradient),
+    'Anova': (_anova, _anova_gradient),
+    'Sigmoid': (_sigmoid, _sigmoid_gradient),
+    'RQ': (_rq, _rq_gradient),
+    # No gradient is implemented for SRQ, only the kernel is returned.
+    'SRQ': (_srq, _srq),
+    'MultiQuad': (_multi_quad, _multi_quad_gradient),
+    'InvMultiQuad': (_inv_multi_quad, _inv_multi_quad_gradient),
+    'Wave': (_wave, _wave_gradient),
+    'Power': (_power, _power_gradient),
+    'Log': (_log, _log_gradient),
+    'Cauchy': (_cauchy, _cauchy_gradient),
+    'Tstudent': (_tstudent, _tstudent_gradient),
+}
+
 def Kernel(X1, X2, Type, *params, gradient=False):
     '''
     All the kernels have a bit of noise added in order to prevent the covariance
     matrix becoming singular. The amount of noise to be added is also a 
     parameter to reconstruct
     '''
-    
-    def dif(array1, array2):
-        Output = [array1[i] - array2[i] for i in range(len(array1))]
-        Output = np.array(Output).ravel()
-        return sum(Output)
-    
-    if Type == 'SQE':
-        sqdist = np.sum(X1**2, 1).reshape(-1, 1) + np.sum(X2**2, 1) - 2 * np.dot(X1, X2.T)
-        K = (params[0][0]**2) * np.exp(-0.5  * sqdist / params[0][1]**2 ) +\
-            ((params[0][-1]**2)*np.eye(X1.shape[0]))
-        if gradient:
-            gradients = [2*params[0][0]*K,np.multiply(sqdist/(params[0][1]**3),K),
-                         2*params[0][-1]*np.eye(X1.shape[0])]
-            return K, gradients
-        else:
-            return K
-        
-    if Type == 'ASQE':
-        LAMBDA = np.eye(len(X2[0]))
-        length_scales = 1/params[0][1:-1]
-        np.fill_diagonal(LAMBDA,length_scales)
-
-        X1 = np.dot(X1,LAMBDA)
-        X2 = np.dot(X2,LAMBDA)
-        sqdist = cdist(X1 , X2, metric='sqeuclidean').T
-        K = (params[0][0]**2) * np.exp(-0.5  * sqdist) +\
-            ((params[0][-1]**2)*np.eye(X1.shape[0]))
-        if gradient:
-            g = [cdist(np.expand_dims(X1[:,i],-1),
-                       np.expand_dims(X2[:,i],-1), 
-                       metric='sqeuclidean')/(params[0][i+1]) \
-                 for i in range(X1.shape[1]) ]
-            gradients = [np.multiply(g[i],K) for i in range(X1.shape[1])]    
-            gradients = [2*params[0][0]*K] + gradients + [2*params[0][-1]*np.eye(X1.shape[0])]
- 
-            return K, gradients
-        else:
-            return K
-
-    if Type == 'LAP':
-        dist = np.sqrt(np.sum(X1**2, 1).reshape(-1, 1) + np.sum(X2**2, 1) - 2 * np.dot(X1, X2.T))
-        K = (params[0][0]**2) * np.exp(-0.5  * dist / params[0][1] ) +\
-            ((params[0][-1]**2)*np.eye(X1.shape[0]))
-        if gradient:
-            gradients = [2*params[0][0]*K,np.multiply(dist/(params[0][1]**2),K),
-                         2*params[0][-1]*np.eye(X1.shape[0])]
-            return K, gradients
-        else:
-            return K
-
-    if Type == 'ALAP':
-        dist = np.sqrt(cdist(X1/params[0][1:-1],X2/params[0][1:-1], metric='euclidean').T)
-        K = (params[0][0]**2) * np.exp(-0.5  * dist) +\
-            ((params[0][-1]**2)*np.eye(X1.shape[0]))
-        if gradient:
-            g = [cdist(np.expand_dims(X1[:,i]/params[0][i+1],-1),
-                       np.expand_dims(X2[:,i]/params[0][i+1],-1), 
-                       metric='euclidean')/(params[0][i+1]) \
-                 for i in range(X1.shape[1]) ]
-            gradients = [np.multiply(g[i],K) for i in range(X1.shape[1])]    
-            gradients = [2*params[0][0]*K] + gradients + [2*params[0][-1]*np.eye(X1.shape[0])]
-            
-            return K, gradients
-        else:
-            return K
-        
-    if Type == 'Linear':
-        # This is a version of Linear modified to include lengthscales for each
-        # Input Variable
-# =============================================================================
-#         K = a*X.Y+b
-# =============================================================================
-        LAMBDA = np.eye(len(params[0][2:-1]))
-        length_scales = 1/params[0][2:-1]
-        np.fill_diagonal(LAMBDA,length_scales)
-        X1 = np.dot(X1,LAMBDA)
-        X2 = np.dot(X2,LAMBDA) 
-        K = (params[0][0]*np.dot(X1,X2.T).T)+params[0][1] +\
-            ((params[0][-1]**2)*np.eye(X1.shape[0]))
-  
-        if gradient:
-            gradients = [np.dot(X1,X2.T).T] + [np.eye(K.shape[0])] + [2*params[0][0]*\
-                                                   np.dot(np.expand_dims(X1[:,i],-1)
-                                                          ,np.expand_dims(X2[:,i],-1).T).T/\
-                                                       params[0][i]\
-                                                       for i in range(X1.shape[1])] 
-            gradients = gradients + [2*params[0][-1]*np.eye(X1.shape[0])]
-            return K, gradients
-        else:
-            return K
-        
-    if Type == 'Poly':
-# =============================================================================
-#         K = (a*(X.Y)+b)**c
-# =============================================================================
-        LAMBDA = np.eye(len(params[0][3:-1]))
-        length_scales = 1/params[0][3:-1]
-        np.fill_diagonal(LAMBDA,length_scales)
-        X1 = np.dot(X1,LAMBDA)
-        X2 = np.dot(X2,LAMBDA) 
-        K = ((params[0][0]*np.dot(X1,X2.T).T)+params[0][1])**params[0][2] +\
-            ((params[0][-1]**2)*np.eye(X1.shape[0]))
-
-        if gradient:
-            db = params[0][2]*((params[0][0]*np.dot(X1,X2.T))+params[0][1])**(params[0][2]-1)
-            da = np.multiply(np.dot(X1,X2.T),db)
-            dc =  np.multiply(K,np.log((params[0][0]*np.dot(X1,X2.T)) + params[0][1]))
-            gradients = [da,db,dc]+\
-                [2*params[0][0]*np.multiply(np.dot(np.expand_dims(X1[:,i],-1),
-                                                    np.expand_dims(X2[:,i],-1).T)/\
-                                             params[0][i],db) \
-                 for i in range(X1.shape[1])]
-            gradients = gradients + [2*params[0][-1]*np.eye(X1.shape[0])]
-            return K, gradients
-        else:
-            return K
-        return 
-    if Type == 'Anova':
-        # This isn't working, probably some parameters for lengthscales are needed for each dimension
-        K = np.exp((-params[0][0]*cdist(X1,X2, metric='sqeuclidean'))**params[0][1]) +\
-            np.exp((-params[0][0]*cdist(X1**2,X2**2, metric='sqeuclidean'))**params[0][1])+ \
-            np.exp((-params[0][0]*cdist(X1**3,X2**3, metric='sqeuclidean'))**params[0][1]) +\
-            ((params[0][-1]**2)*np.eye(X1.shape[0]))# Not working
-        if gradient:
-            dd = params[0][1] * (np.exp((-params[0][0]*cdist(X1 , X2, metric='sqeuclidean'))**(params[0][1]-1)) +\
-            np.exp((-params[0][0] *cdist(X1**2 , X2**2, metric='sqeuclidean'))**(params[0][1]-1)) + \
-                np.exp((-params[0][0]*cdist(X1**3 , X2**3, metric='sqeuclidean'))**(params[0][1]-1)))
-            gradients = [-np.multiply(cdist(X1 , X2, metric='sqeuclidean'),dd),
-                         -np.multiply(cdist(X1**2 , X2**2, metric='sqeuclidean'),dd),
-                         -np.multiply(cdist(X1**3 , X2**3, metric='sqeuclidean'),dd), dd,
-                         2*params[0][-1]*np.eye(X1.shape[0])]
-            return K, gradients
-        
-        else:
-            return K
-      
-    if Type == 'Sigmoid':
-        # This is not a positive semidefinite Kernel. Some tweaking has to be done
-        # to make this work. Probably along the lines of KdotK.T
-        K = np.tanh(params[0][0]*np.dot(X1,X2.T) + params[0][1]) +\
-            ((params[0][-1]**2)*np.eye(X1.shape[0]))
-        if gradient:
-            sech2 = 1/(np.cosh(params[0][0]*np.dot(X1,X2.T) + params[0][1])**2)
-            gradients = [np.multiply(np.dot(X1,X2.T),sech2),sech2,
-                         2*params[0][-1]*np.eye(X1.shape[0]) ]
-            return K, gradients
-         # This isn't working, probably some parameters for lengthscales are needed for each dimension
-        else:
-            return K
-    
-    if Type == 'RQ':
-        LAMBDA = np.eye(len(X1[0]))
-        length_scales = 1/params[0][1:-1]
-        np.fill_diagonal(LAMBDA,length_scales)
-        X1 = np.dot(X1,LAMBDA)
-        X2 = np.dot(X2,LAMBDA)
-        sqdist = cdist(X1 , X2, metric='sqeuclidean').T
-        K = 1 - (sqdist/(sqdist+(params[0][0])**2)) +\
-            ((params[0][-1]**2)*np.eye(X1.shape[0]))
-        
-        if gradient:
-            denom = 1/((sqdist+(params[0][0])**2))**2
-            g = [cdist(np.expand_dims(X1[:,i],-1),
-                       np.expand_dims(X2[:,i],-1), 
-                       metric='sqeuclidean')/(params[0][i+1]) \
-                 for i in range(X1.shape[1]) ]
-            gradients = [-2*denom*g[i]*(params[0][0])**2 for i in range(X1.shape[1])] 
-            gradients = [2*params[0][0]*sqdist*denom] + gradients +\
-                [2*params[0][-1]*np.eye(X1.shape[0])]
-            return K, gradients
-        
-        else:
-            return K
-        
-    
-    if Type == 'SRQ':
-        LAMBDA = np.eye(len(X1[0]))
-        length_scales = 1/params[0][:-1]
-        np.fill_diagonal(LAMBDA,length_scales)
-        X1 = np.dot(X1,LAMBDA)
-        X2 = np.dot(X2,LAMBDA)
-        sqdist = cdist(X1 , X2, metric='sqeuclidean').T
-        return (1/(1 + (sqdist/params[0][-1])) )**params[0][-1]
-    
-    if Type == 'MultiQuad':
-        # This Kernel is not positive semidefinite so a lot of tweaking would
-        # have to be done to make this work. Maybe take some product of KdotK.T
-        LAMBDA = np.eye(len(X1[0]))
-        length_scales = 1/params[0][1:-1]
-        np.fill_diagonal(LAMBDA,length_scales)
-        X1 = np.dot(X1,LAMBDA)
-        X2 = np.dot(X2,LAMBDA)
-        sqdist = cdist(X1 , X2, metric='sqeuclidean').T
-        K = np.sqrt(sqdist + (params[0][0]**2)) +\
-            ((params[0][-1]**2)*np.eye(X1.shape[0]))
-        if gradient:
-            g = [cdist(np.expand_dims(X1[:,i],-1),
-                       np.expand_dims(X2[:,i],-1), 
-                       metric='sqeuclidean')/(params[0][i+1]) \
-                 for i in range(X1.shape[1]) ]
-            gradients = [np.multiply(g[i],1/K) for i in range(X1.shape[1])]    
-            gradients = [params[0][0]/K] + gradients +\
-                [2*params[0][-1]*np.eye(X1.shape[0])]
-            return K, gradients
-        
-        else:
-            return K
-
-    if Type == 'InvMultiQuad':
-        LAMBDA = np.eye(len(X1[0]))
-        length_scales = 1/params[0][1:-1]
-        np.fill_diagonal(LAMBDA,length_scales)
-        X1 = np.dot(X1,LAMBDA)
-        X2 = np.dot(X2,LAMBDA)
-        sqdist = np.sqrt(cdist(X1 , X2, metric='sqeuclidean').T + (params[0][0]**2))
-        K = 1/sqdist + ((params[0][-1]**2)*np.eye(X1.shape[0]))
-        if gradient:
-            g = [cdist(np.expand_dims(X1[:,i],-1),
-                       np.expand_dims(X2[:,i],-1), 
-                       metric='sqeuclidean')/(params[0][i+1]) \
-                 for i in range(X1.shape[1]) ]
-            gradients = [-np.multiply(g[i],K**3) for i in range(X1.shape[1])]  
-            gradients = [-params[0][0]*(K**3)] +  gradients +\
-                [2*params[0][-1]*np.eye(X1.shape[0])]
-            
-            return K, gradients
-        else:
-            return K
-    if Type == 'Wave':
-        dist = cdist(X1 , X2, metric='euclidean')
-        K = ((params[0][0]/dist) * np.sin(dist/params[0][0])) +\
-            ((params[0][-1]**2)*np.eye(X1.shape[0]))
-        if gradient:
-            arg = dist/params[0][0]
-            gradients = (1/dist) * (np.sin(arg) - (np.cos(arg)/(params[0][0])**2)) +\
-                [2*params[0][-1]*np.eye(X1.shape[0])]
-            return K, gradients
-        else:
-            return K
-       
-    if Type == 'Power':
-        K = cdist(X1/params[0][1:-1],X2/params[0][1:-1], metric='euclidean')**params[0][0] +\
-            ((params[0][-1]**2)*np.eye(X1.shape[0]))
-        if gradient:
-            dd = params[0][0] * cdist(X1/params[0][1:-1],X2/params[0][1:-1], 
-                                      metric='euclidean')**(params[0][0]-1)
-            g = [cdist(np.expand_dims(X1[:,i]/params[0][i+1],-1),
-                       np.expand_dims(X2[:,i]/params[0][i+1],-1), 
-                       metric='sqeuclidean')/(params[0][i+1]) \
-                 for i in range(X1.shape[1]) ]
-            gradients = [np.multiply(g[i],dd) for i in range(X1.shape[1])]  
-            gradients = [dd] +  gradients + [2*params[0][-1]*np.eye(X1.shape[0])]
-            return K, gradients
-        else:
-            return K
-    
-    if Type == 'Log':
-        # This is a non positive definite Kernel
-        dist = cdist(X1 , X2, metric='euclidean').T
-        K = -np.log((dist**params[0][0]) + 1) +\
-            ((params[0][-1]**2)*np.eye(X1.shape[0]))
-        if gradient:
-            arg = dist**params[0][0]
-            gradients = arg * np.log(dist)/ (arg+1) +\
-                [2*params[0][-1]*np.eye(X1.shape[0])]
-            return K, gradients
-        else:
-            return K
-
-    if Type == 'Cauchy':
-        # This works very nice and fast
-        sqdist = cdist(X1 , X2, metric='sqeuclidean').T
-        K = 1/(1+(sqdist/(params[0][0]**2))) +\
-            ((params[0][-1]**2)*np.eye(X1.shape[0]))
-        if gradient:
-            gradients = [sqdist/(((params[0][0]**2)+sqdist)**2)] +\
-                [2*params[0][-1]*np.eye(X1.shape[0])]
-            return K, gradients
-        else:
-            return K
- 
-    if Type == 'Tstudent':
-        # This isn't working at the moment
-        LAMBDA = np.eye(len(X1[0]))
-        length_scales = 1/params[0][1:]
-        np.fill_diagonal(LAMBDA,length_scales)
-        X1 = np.dot(X1,LAMBDA)
-        X2 = np.dot(X2,LAMBDA)
-        sqdist = cdist(X1 , X2, metric='euclidean').T
-        K = 1/(1+(sqdist**params[0][0])) +\
-            ((params[0][-1]**2)*np.eye(X1.shape[0]))
-        if gradient:
-            da = -(sqdist**params[0][0])*np.log(sqdist)*(K**2)
-            arg = (sqdist**(params[0][0]-2))*(K**2) 
-            gradients =  [da] + [params[0][0]*np.multiply(
-                cdist(np.expand_dims(X1[:,i],-1),
-                       np.expand_dims(X2[:,i],-1), 
-                       metric='sqeuclidean')/(params[0][i+1]),arg) 
-                                 for i in range(X1.shape[1])] +\
-                [2*params[0][-1]*np.eye(X1.shape[0])]
-            return K, gradients
-        else:
-            return K
-
+    try:
+        kernel, kernel_gradient = _KERNEL_DISPATCH[Type]
+    except KeyError:
+        msg = f"Unknown kernel type '{Type}'."
+        raise ValueError(msg)
+    if gradient:
+        return kernel_gradient(X1, X2, params)
+    return kernel(X1, X2, params)
@@ -8,8 +8,17 @@ import json
 import numpy as np
 import os
 
+try:
+    import orjson
+except ImportError:
+    # orjson is optional, the standard library is used as a fallback.
+    orjson = None
+
 from . import kernel
 
+# Contents of the files read by 'load_cached', keyed by the loading
+# function and the absolute path of the file.
+_FILE_CACHE = {}
 
 #TODO
 # - Find a workaround for the ugly calculations that are currently
@@ -20,7 +29,13 @@ def main():
     return
 
 def predict(uid_fname=""):
-    """Calculate the spent fuel composition."""
+    """Calculate the spent fuel composition.
+
+    Parameters
+    ----------
+    uid_fname : str, optional
+        Unique identifier used in the input and output filenames.
+    """
     # Rationale for the choice of these isotopes:
     # - isotope fraction > 1e-15
     # - stable U isotopes, i.e., 1/2 time > days (omit U230, 231, 237)
@@ -50,8 +65,7 @@ def predict(uid_fname=""):
             raise FileNotFoundError(msg)
 
     # Load input parameters, training data and the kernel type.
-    training_data = np.load(os.path.join(data_dir, "x_trainingset.npy"),
-                            allow_pickle=True)
+    training_data = load_array(os.path.join(data_dir, "x_trainingset.npy"))
     if not os.path.isfile(os.path.join(data_dir,
                                    "y_trainingset_reduced.npy")):
         y_data = np.load(os.path.join(data_dir, "y_trainingset.npy"),
@@ -60,9 +74,8 @@ def predict(uid_fname=""):
             y_data, isotopes,
             os.path.join(data_dir, "y_trainingset_reduced.npy"))
 
-    y_data = np.load(
-        os.path.join(data_dir, "y_trainingset_reduced.npy"),
-        allow_pickle=True).item()
+    y_data = load_array(
+        os.path.join(data_dir, "y_trainingset_reduced.npy")).item()
     par = ("enrichment", "temperature", "power_output", "burnup")
     reactor_input_params = get_input_params(par, uid_fname)
     reactor_input_params = np.expand_dims(reactor_input_params, axis=0)
@@ -70,31 +83,52 @@ def predict(uid_fname=""):
     # Calculate the spent fuel composition for all isotopes.
     spent_fuel_composition = {"spent_fuel_composition": {}}
     for iso in isotopes:
-        kernel_fname = os.path.join(kernel_dir, f"{iso}.npy")
-        params_fname = os.path.join(kernel_dir,
-                                    f"training_params_{iso}.json")
-        with open(params_fname, "r") as f:
-            data = json.load(f)
-            kernel_type = data["kernel_type"]
-            size = data["size"]
-        x_train = training_data[:size]
-        y_train = np.array(y_data[iso])[:size]
-        check_input_params(reactor_input_params, x_train)
-        trained_kernel = np.load(kernel_fname,
-                                 allow_pickle=True).item()
-        mass = run_kernel(reactor_input_params, x_train, y_train,
-                          trained_kernel, kernel_type)
-
-        if mass < 0:
-            msg = (f"Calculated mass of {iso} in spent fuel is {mass} "
-                   + "kg.\nHowever, the mass cannot be negative!\n"
-                   + f"Parameters used: {reactor_input_params}")
-            raise RuntimeError(msg)
-
+        mass = predict_isotope(iso, kernel_dir, training_data, y_data,
+                               reactor_input_params)
         iso = iso[:-1]+"M" if iso[-1] == "m" else iso
         spent_fuel_composition["spent_fuel_composition"][iso] = mass
     store_results(spent_fuel_composition, uid_fname)
 
+def predict_isotope(iso, kernel_dir, training_data, y_data,
+                    reactor_input_params):
+    """Calculate the mass of one isotope in the spent fuel.
+
+    Parameters
+    ----------
+    iso : str
+        The isotope, e.g., 'U235' or 'Pu239'.
+    kernel_dir : str
+        Directory containing the trained kernels and their parameters.
+    training_data : array
+        Input parameters used during training.
+    y_data : dict
+        Output used during training with the isotopes as keys.
+    reactor_input_params : array
+        Input parameters of the reactor, see 'get_input_params'.
+
+    Returns
+    -------
+    mass : float
+        The mass of the isotope in the spent fuel.
+    """
+    kernel_fname = os.path.join(kernel_dir, f"{iso}.npy")
+    params_fname = os.path.join(kernel_dir, f"training_params_{iso}.json")
+    kernel_type, size = load_training_params(params_fname)
+    x_train = training_data[:size]
+    y_train = np.array(y_data[iso])[:size]
+    check_input_params(reactor_input_params, x_train)
+    trained_kernel = load_array(kernel_fname).item()
+    mass = run_kernel(reactor_input_params, x_train, y_train,
+                      trained_kernel, kernel_type)
+
+    if mass < 0:
+        msg = (f"Calculated mass of {iso} in spent fuel is {mass} "
+               + "kg.\nHowever, the mass cannot be negative!\n"
+               + f"Parameters used: {reactor_input_params}")
+        raise RuntimeError(msg)
+
+    return mass
+
 def check_input_params(params, training_data):
     """Check the validity of the input parameters.
 
@@ -113,6 +147,87 @@ def check_input_params(params, training_data):
                + f"Maximum parameter values: {max_vals}")
         raise ValueError(msg)
 
+def load_cached(fname, load):
+    """Return load(fname), reusing the result of earlier calls.
+
+    The training data and the trained kernels are the same for every
+    call of 'predict' during a simulation. The cached result is only
+    reloaded if the modification time of the file changes. It is shared
+    between calls and must not be modified.
+
+    Parameters
+    ----------
+    fname : str
+        Path of the file.
+    load : callable
+        Function reading the file, called with the absolute path.
+
+    Returns
+    -------
+    data
+        The result of load.
+    """
+    fname = os.path.abspath(fname)
+    mtime = os.stat(fname).st_mtime_ns
+    cached = _FILE_CACHE.get((load, fname))
+    if cached is not None and cached[0] == mtime:
+        return cached[1]
+
+    data = load(fname)
+    _FILE_CACHE[(load, fname)] = (mtime, data)
+    return data
+
+def load_array(fname):
+    """Load a .npy file, see 'load_cached'."""
+    return load_cached(fname, _load_npy)
+
+def _load_npy(fname):
+    return np.load(fname, allow_pickle=True)
+
+def load_training_params(fname):
+    """Read the kernel type and training set size of a trained kernel.
+
+    The file is only parsed again if it changed, see 'load_cached'.
+
+    Parameters
+    ----------
+    fname : str
+        Path of the 'training_params_<isotope>.json' file.
+
+    Returns
+    -------
+    kernel_type : str
+        The type of the trained kernel.
+    size : int
+        The number of training samples used.
+    """
+    return load_cached(fname, _parse_training_params)
+
+def _parse_training_params(fname):
+    data = load_json(fname)
+    return data["kernel_type"], data["size"]
+
+def load_json(fname):
+    """Read a .json file, using orjson if it is available."""
+    if orjson is None:
+        with open(fname, "r") as f:
+            return json.load(f)
+    with open(fname, "rb") as f:
+        return orjson.loads(f.read())
+
+def dump_json(data, fname):
+    """Write data to a compact .json file, using orjson if available.
+
+    The files are only read by the GprReactor, so they are written
+    without indentation.
+    """
+    if orjson is None:
+        with open(fname, "w") as f:
+            json.dump(data, f, separators=(",", ":"))
+        return
+    with open(fname, "wb") as f:
+        f.write(orjson.dumps(data, option=orjson.OPT_SERIALIZE_NUMPY))
+
 def shrink_dictionary(data, isotopes, fname):
     """Remove unnecessary data from dictionary to reduce runtime
 
@@ -154,31 +269,30 @@ def get_input_params(pnames, uid_fname=""):
         specified in `pnames`.
     """
     fname = f"gpr_reactor_input_params{uid_fname}.json"
-    with open(fname, "r") as f:
-        data = json.load(f)
-        input_params = []
-        
-        for param in pnames:
-            param = param.lower()
-            if param == "enrichment":
-                enrich = data["fresh_fuel_composition"]["922350000"]
-                input_params.append(enrich)
-            elif param == "power_output":
-                # These calculations below have to be performed for the
-                # Savannah River Site reactor. Currently, they are
-                # hardcoded but this is hopefully subject to change.
-                # TODO update this implementation
-                n_assemblies_tot = 510;
-                n_assemblies_model = 18;
-                feet_to_cm = 30.48;
-                assembly_length = 12;  # in feet
-                power = (data[param] * n_assemblies_model
-                         / n_assemblies_tot / assembly_length
-                         / feet_to_cm)
-                power *= 1e6  # conversion MW to W
-                input_params.append(power)
-            else:
-                input_params.append(data[param])
+    data = load_json(fname)
+    input_params = []
+    
+    for param in pnames:
+        param = param.lower()
+        if param == "enrichment":
+            enrich = data["fresh_fuel_composition"]["922350000"]
+            input_params.append(enrich)
+        elif param == "power_output":
+            # These calculations below have to be performed for the
+            # Savannah River Site reactor. Currently, they are
+            # hardcoded but this is hopefully subject to change.
+            # TODO update this implementation
+            n_assemblies_tot = 510;
+            n_assemblies_model = 18;
+            feet_to_cm = 30.48;
+            assembly_length = 12;  # in feet
+            power = (data[param] * n_assemblies_model
+                     / n_assemblies_tot / assembly_length
+                     / feet_to_cm)
+            power *= 1e6  # conversion MW to W
+            input_params.append(power)
+        else:
+            input_params.append(data[param])
     
     return np.array(input_params)
 
@@ -192,8 +306,7 @@ def store_results(composition, uid_fname=""):
         being the corresponding masses.
     """
     fname = f"gpr_reactor_spent_fuel_composition{uid_fname}.json"
-    with open(fname, "w") as f:
-        json.dump(composition, f, indent=2)
+    dump_json(composition, fname)
 
 def run_kernel(reactor_input_params, x_train, y_train, trained_kernel,
                kernel_type='ASQE'):
@@ -0,0 +1,96 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Compare the kernels against reference values.
+
+The reference values in 'kernel_reference.npz' were calculated with the
+original implementation of 'kernel.Kernel', i.e., the single function
+with one branch per kernel type, for the inputs and parameters stored in
+the same file.
+"""
+
+import os
+import unittest
+import unittest.mock
+import warnings
+
+import numpy as np
+
+from spentfuelgpr import kernel
+
+REFERENCE_FNAME = os.path.join(os.path.dirname(__file__),
+                               "kernel_reference.npz")
+KERNEL_TYPES = ("SQE", "ASQE", "LAP", "ALAP", "Linear", "Poly", "Anova",
+                "Sigmoid", "RQ", "SRQ", "MultiQuad", "InvMultiQuad", "Wave",
+                "Power", "Log", "Cauchy", "Tstudent")
+# Names of the inputs X1 and X2 in the reference file.
+CASES = {"self": ("X", "X"), "square": ("A", "B"), "row": ("x", "Z")}
+
+class KernelTest(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls):
+        with np.load(REFERENCE_FNAME) as f:
+            cls.reference = dict(f)
+
+    def setUp(self):
+        # The reference contains zero distances, e.g., in the Wave kernel.
+        warnings.simplefilter("ignore", RuntimeWarning)
+        self.addCleanup(warnings.resetwarnings)
+
+    def assert_close(self, actual, desired):
+        np.testing.assert_allclose(actual, desired, rtol=1e-7, atol=1e-12)
+
+    def check_kernels(self):
+        for kernel_type in KERNEL_TYPES:
+            params = self.reference[f"{kernel_type}/params"]
+            for case, (x1, x2) in CASES.items():
+                key = f"{kernel_type}/{case}"
+                X1 = self.reference[x1]
+                # Use the same array for both inputs as the callers do.
+                X2 = X1 if x1 == x2 else self.reference[x2]
+                with self.subTest(kernel_type=kernel_type, case=case):
+                    K = kernel.Kernel(X1, X2, kernel_type, params.copy())
+                    self.assert_close(K, self.reference[f"{key}/K"])
+
+                    result = kernel.Kernel(X1, X2, kernel_type, params.copy(),
+                                           gradient=True)
+                    if kernel_type == "SRQ":
+                        # SRQ has no gradient and returns the kernel only.
+                        self.assert_close(result, self.reference[f"{key}/K"])
+                        continue
+                    K, gradients = result
+                    self.assert_close(K, self.reference[f"{key}/K"])
+                    self.check_gradients(key, gradients)
+
+    def check_gradients(self, key, gradients):
+        self.assertIsInstance(gradients, list)
+        if f"{key}/gradient_sum" in self.reference:
+            # The original Wave and Log kernels added the noise gradient
+            # to the length scale gradient instead of returning a list.
+            self.assertEqual(len(gradients), 2)
+            self.assert_close(gradients[0] + gradients[1],
+                              self.reference[f"{key}/gradient_sum"][0])
+            return
+        n_gradients = sum(1 for name in self.reference
+                          if name.startswith(f"{key}/gradient_"))
+        self.assertEqual(len(gradients), n_gradients)
+        for i, gradient in enumerate(gradients):
+            self.assert_close(gradient, self.reference[f"{key}/gradient_{i}"])
+
+    @unittest.skipIf(kernel.numba is None, "numba is not installed")
+    def test_kernels_numba(self):
+        self.check_kernels()
+
+    def test_kernels_numpy(self):
+        with unittest.mock.patch.multiple(kernel, _sqe_core=None,
+                                          _lap_core=None, _cauchy_core=None,
+                                          _srq_core=None):
+            self.check_kernels()
+
+    def test_unknown_type(self):
+        X = self.reference["X"]
+        with self.assertRaises(ValueError):
+            kernel.Kernel(X, X, "Unknown", np.ones(3))
+
+if __name__ == "__main__":
+    unittest.main()
@@ -1,7 +1,9 @@
 #include "enrichment_calculator.h"
 
 #include <cmath>
+#include <iomanip>
 #include <iostream>
+#include <sstream>
 #include <string>
 
 #include "comp_math.h"
@@ -38,6 +40,7 @@ EnrichmentCalculator::EnrichmentCalculator(
       target_product_qty(product_qty),
       feed_qty(0.), product_qty(0.),
       max_swu(max_swu),
+      n_enriching(0), n_stripping(0),
       use_downblending(use_downblending),
       isotopes(IsotopesNucID()) {
   if (feed_qty==1e299 && product_qty==1e299 && max_swu==1e299) {
@@ -59,6 +62,7 @@ EnrichmentCalculator::EnrichmentCalculator(const EnrichmentCalculator& e) :
     target_tails_assay(e.target_tails_assay),
     target_feed_qty(e.target_feed_qty),
     target_product_qty(e.target_product_qty), max_swu(e.max_swu),
+    n_enriching(e.n_enriching), n_stripping(e.n_stripping),
     use_downblending(e.use_downblending), isotopes(IsotopesNucID()),
     gamma_235(e.gamma_235) {
   CalculateGammaAlphaStar_();
@@ -68,10 +72,27 @@ EnrichmentCalculator::EnrichmentCalculator(const EnrichmentCalculator& e) :
 // - - - - - - - - - - - - - - - - - - - - - - - - - - - - - - - - - - - -
 void EnrichmentCalculator::CalculateGammaAlphaStar_() {
   separation_factors = CalculateSeparationFactor(gamma_235);
+  const double sqrt_separation_factor_235 = std::sqrt(
+      separation_factors[IsotopeToNucID(235)]);
+  
+  alpha_star.clear();
+  log_alpha_star.clear();
   for (int i : isotopes) {
     // E. von Halle Eq. (15)
-    alpha_star[i] = separation_factors[i]
-                    / std::sqrt(separation_factors[IsotopeToNucID(235)]); 
+    alpha_star.push_back(separation_factors[i] / sqrt_separation_factor_235);
+    log_alpha_star.push_back(std::log(alpha_star.back()));
+  }
+
+  // The coefficients of the value function only depend on the separation
+  // factors, see ValueFunction_.
+  const double separation_factor_235 = separation_factors[
+      IsotopeToNucID(235)];
+  value_function_coeffs.clear();
+  value_function_log_term.clear();
+  for (int i : isotopes) {
+    double k = (separation_factors[i]-1) / (separation_factor_235-1);
+    value_function_log_term.push_back(cyclus::AlmostEq(k, 0.5));
+    value_function_coeffs.push_back(1. / (2*k - 1));
   }
 }
 
@@ -102,29 +123,35 @@ EnrichmentCalculator& EnrichmentCalculator::operator= (
 
 // - - - - - - - - - - - - - - - - - - - - - - - - - - - - - - - - - - - -
 void EnrichmentCalculator::PPrint() {
-  std::cout << "- - - - - - - - - - - - - - - - - - - - - -\n"
-            << "MIso Enrichment Calculator with parameters:\n"
-            << "  Target product assay   " << target_product_assay << "\n"
-            << "  Target tails assay     " << target_tails_assay << "\n"
-            << "  Maximum SWU            " << max_swu << "\n\n"
-            << "  Feed quantity          " << feed_qty << "\n"
-            << "  Product quantity       " << product_qty << "\n"
-            << "  Tails quantity         " << tails_qty << "\n"
-            << "  Separative work used   " << swu << "\n\n"
-            << "  n(enriching)           " << n_enriching << "\n"
-            << "  n(stripping)           " << n_stripping << "\n"
-            << "  Separation factors         232     233      234      235"
-            << "      236      238\n                         ";
+  // The output is assembled first and then written to stdout at once.
+  std::stringstream ss;
+  ss << "- - - - - - - - - - - - - - - - - - - - - -\n"
+     << "MIso Enrichment Calculator with parameters:\n"
+     << "  Target product assay   " << target_product_assay << "\n"
+     << "  Target tails assay     " << target_tails_assay << "\n"
+     << "  Maximum SWU            " << max_swu << "\n\n"
+     << "  Feed quantity          " << feed_qty << "\n"
+     << "  Product quantity       " << product_qty << "\n"
+     << "  Tails quantity         " << tails_qty << "\n"
+     << "  Separative work used   " << swu << "\n\n"
+     << "  n(enriching)           " << n_enriching << "\n"
+     << "  n(stripping)           " << n_stripping << "\n"
+     << "  Separation factors         232     233      234      235"
+     << "      236      238\n                         ";
+  ss << std::fixed << std::setprecision(4);
   for (int nuc : isotopes) {
-    printf("%6.4f   ", separation_factors[nuc]);
+    ss << std::setw(6) << separation_factors[nuc] << "   ";
   }
-  std::cout << "\n  Compositions\n"
-            << "  Isotope         Feed     Product       Tails\n";
+  ss << "\n  Compositions\n"
+     << "  Isotope         Feed     Product       Tails\n";
+  ss << std::scientific;
   for (int nuc : isotopes) {
-    printf("      %3d   %10.4e  %10.4e  %10.4e\n", NucIDToIsotope(nuc),
-        feed_composition[nuc], product_composition[nuc], 
-        tails_composition[nuc]);
+    ss << "      " << std::setw(3) << NucIDToIsotope(nuc) 
+       << "   " << std::setw(10) << feed_composition[nuc] 
+       << "  " << std::setw(10) << product_composition[nuc] 
+       << "  " << std::setw(10) << tails_composition[nuc] << "\n";
   }
+  std::cout << ss.str();
 }
 
 // - - - - - - - - - - - - - - - - - - - - - - - - - - - - - - - - - - - -
@@ -225,6 +252,7 @@ void EnrichmentCalculator::ProductOutput(
 
 // - - - - - - - - - - - - - - - - - - - - - - - - - - - - - - - - - - - -
 void EnrichmentCalculator::BuildMatchedAbundanceRatioCascade() {
+  CalculateFeedFractions_();
   CalculateNStages_();
   CalculateFlows_();
   
@@ -233,34 +261,118 @@ void EnrichmentCalculator::BuildMatchedAbundanceRatioCascade() {
   }
 }
 
+// - - - - - - - - - - - - - - - - - - - - - - - - - - - - - - - - - - - -
+void EnrichmentCalculator::CalculateFeedFractions_() {
+  // Equivalent to calling MIsoFrac for every isotope, but performed in a 
+  // single pass over the feed composition. Non-uranium elements are not
+  // considered here as they are directly sent to the tails.
+  double uranium_atom_frac = 0;
+  feed_fractions.assign(isotopes.size(), 0.);
+  for (int idx = 0; idx < isotopes.size(); idx++) {
+    cyclus::CompMap::const_iterator it = feed_composition.find(
+        isotopes[idx]);
+    if (it != feed_composition.end()) {
+      feed_fractions[idx] = it->second;
+      uranium_atom_frac += it->second;
+    }
+  }
+  for (double& atom_frac : feed_fractions) {
+    atom_frac /= uranium_atom_frac;
+  }
+}
+
 // - - - - - - - - - - - - - - - - - - - - - - - - - - - - - - - - - - - -
 void EnrichmentCalculator::CalculateNStages_() {
   // The target concentrations should always be reached or exceeded (i.e.,
   // at least equal U235 concentration in product, at most equal 
   // U235 concentration in tails).
-  n_enriching = 0;
+  // The searches start from the numbers of stages of the previous cascade
+  // because consecutive calls to SetInput mostly use similar inputs. The
+  // enriching section is always designed without stripping stages.
+  int previous_n_stripping = n_stripping;
   n_stripping = 0; 
-  do {
-    n_enriching++;
-    CalculateConcentrations_();
-  } while (MIsoAssay(product_composition) < target_product_assay
-           && n_enriching <= kIterMax);
-  do {
-    n_stripping++;
+  MinimiseNStages_(n_enriching, true);
+  n_stripping = previous_n_stripping;
+  MinimiseNStages_(n_stripping, false);
+  
+  // The search may have ended on a different number of stages than the 
+  // one it returns.
+  if (n_enriching != concentrations_n_enriching
+      || n_stripping != concentrations_n_stripping) {
     CalculateConcentrations_();
-  } while (MIsoAssay(tails_composition) > target_tails_assay
-           && n_stripping <= kIterMax);
+  }
 
   if ((n_enriching == kIterMax) || (n_stripping == kIterMax)) {
     throw cyclus::Error("Unable to determine the number of stages!");
   }
 }
 
+// - - - - - - - - - - - - - - - - - - - - - - - - - - - - - - - - - - - -
+void EnrichmentCalculator::MinimiseNStages_(int& n_stages, bool enriching) {
+  // The product (tails) assay increases (decreases) monotonically with the
+  // number of enriching (stripping) stages for all relevant assays. Hence,
+  // the smallest number of stages reaching the target is bracketed by 
+  // moving away from the initial guess 'n_stages' with doubling step 
+  // sizes and then found by bisection instead of trying out every number
+  // of stages. Throughout the search, 'lower' stages do not reach the 
+  // target while 'upper' stages do. If the target cannot be reached, 
+  // kIterMax+1 stages are used.
+  const int max_stages = kIterMax + 1;
+  int guess = (n_stages >= 1 && n_stages < max_stages) ? n_stages : 1;
+  int lower = 0;
+  int upper = max_stages;
+  int step = 1;
+
+  n_stages = guess;
+  if (TargetAssayReached_(enriching)) {
+    upper = guess;
+    while (upper-step > 0) {
+      n_stages = upper - step;
+      if (!TargetAssayReached_(enriching)) {
+        lower = n_stages;
+        break;
+      }
+      upper = n_stages;
+      step *= 2;
+    }
+  } else {
+    lower = guess;
+    while (lower+step < max_stages) {
+      n_stages = lower + step;
+      if (TargetAssayReached_(enriching)) {
+        upper = n_stages;
+        break;
+      }
+      lower = n_stages;
+      step *= 2;
+    }
+  }
+  while (upper-lower > 1) {
+    n_stages = (lower+upper) / 2;
+    if (TargetAssayReached_(enriching)) {
+      upper = n_stages;
+    } else {
+      lower = n_stages;
+    }
+  }
+  n_stages = upper;
+}
+
+// - - - - - - - - - - - - - - - - - - - - - - - - - - - - - - - - - - - -
+bool EnrichmentCalculator::TargetAssayReached_(bool enriching) {
+  CalculateConcentrations_();
+  if (enriching) {
+    return MIsoAssay(product_composition) >= target_product_assay;
+  }
+  return MIsoAssay(tails_composition) <= target_tails_assay;
+}
+
 // - - - - - - - - - - - - - - - - - - - - - - - - - - - - - - - - - - - -
 void EnrichmentCalculator::CalculateFlows_() {
-  double sum_e;
-  double sum_s;
-  CalculateSums(sum_e, sum_s);
+  // The sums of Eqs. (47) and (50) have been calculated alongside the
+  // product and tails compositions, see CalculateConcentrations_.
+  double sum_e = sum_enriching;
+  double sum_s = sum_stripping;
 
   // In the following, it is determined if the feed or the product quantity
   // available is a constraint. For this, the target feed and product 
@@ -278,38 +390,38 @@ void EnrichmentCalculator::CalculateFlows_() {
   // Having determined the enrichment flows, calculate the separative work
   // that is performed and check if it does not exceed the SWU capacity.
   // If it does, recalculate using the given SWU capacity.
-  CalculateSwu_();
+  double v_feed = ValueFunction_(feed_composition);
+  double v_product = ValueFunction_(product_composition);
+  double v_tails = ValueFunction_(tails_composition);
+  
+  CalculateSwu_(v_feed, v_product, v_tails);
   if (swu > max_swu) {
     swu = max_swu;
     
-    feed_qty = swu / (ValueFunction_(product_composition)*sum_e
-                      + ValueFunction_(tails_composition)*sum_s
-                      - ValueFunction_(feed_composition));
+    feed_qty = swu / (v_product*sum_e + v_tails*sum_s - v_feed);
     product_qty = feed_qty * sum_e;
     tails_qty = feed_qty * sum_s;
   } 
 }
 
 // - - - - - - - - - - - - - - - - - - - - - - - - - - - - - - - - - - - -
-void EnrichmentCalculator::CalculateSwu_() {
-  double v_f = ValueFunction_(feed_composition);
-  double v_p = ValueFunction_(product_composition);
-  double v_t = ValueFunction_(tails_composition);
-
-  swu = v_p*product_qty + v_t*tails_qty - v_f*feed_qty;
+void EnrichmentCalculator::CalculateSwu_(double v_feed, double v_product,
+                                         double v_tails) {
+  swu = v_product*product_qty + v_tails*tails_qty - v_feed*feed_qty;
 }
 
 // - - - - - - - - - - - - - - - - - - - - - - - - - - - - - - - - - - - -
 double EnrichmentCalculator::ValueFunction_(
     const cyclus::CompMap& composition) {
-  const int NUCID_235 = IsotopeToNucID(235);
-  const int NUCID_238 = IsotopeToNucID(238);
+  static const int NUCID_235 = IsotopeToNucID(235);
+  static const int NUCID_238 = IsotopeToNucID(238);
   double value = 0.;
   
-  try {
-    composition.at(NUCID_235);
-    composition.at(NUCID_238);
-  } catch (const std::out_of_range& err) {
+  // Missing isotopes are detected using 'find' rather than by catching 
+  // the exceptions thrown by 'at', which is much slower.
+  cyclus::CompMap::const_iterator it_235 = composition.find(NUCID_235);
+  cyclus::CompMap::const_iterator it_238 = composition.find(NUCID_238);
+  if (it_235 == composition.end() || it_238 == composition.end()) {
     if (composition.size()==0) {
       // This case can happen, e.g., during initalisation and is not a bug.
       return value;
@@ -320,26 +432,34 @@ double EnrichmentCalculator::ValueFunction_(
         << "'EnrichmentCalculator::ValueFunction_'.";
     throw cyclus::KeyError(msg.str());
   }
-
-  for (int i : isotopes) {
-    try {
-      composition.at(i);
-    } catch (const std::out_of_range& err) {
+  const double x_238 = it_238->second;
+
+  // Both 'isotopes' and the composition are sorted by NucID, hence all
+  // isotopes are found in a single pass over the uranium entries of the
+  // composition instead of one lookup per isotope.
+  cyclus::CompMap::const_iterator it = composition.lower_bound(
+      isotopes.front());
+  for (int idx = 0; idx < isotopes.size(); idx++) {
+    while (it != composition.end() && it->first < isotopes[idx]) {
+      ++it;
+    }
+    if (it == composition.end()) {
+      break;
+    }
+    if (it->first != isotopes[idx]) {
       continue;
     }
-    double k = (separation_factors[i]-1)
-               / (separation_factors[NUCID_235]-1);
-    if (cyclus::AlmostEq(k, 0.5)) {
+    if (value_function_log_term[idx]) {
       // This formula is not included in  de la Garza 1963, it is taken 
       // from the preceding article, see Eq. (26) in:
       // A. de la Garza et al., 'Multicomponent isotope separation in 
       // cascades'. Chemical Engineering Science 15, pp. 188-209 (1961).
-      value += std::log(composition.at(i) / composition.at(NUCID_238));
+      value += std::log(it->second / x_238);
     } else {
-      value += composition.at(i) / (2*k - 1);
+      value += it->second * value_function_coeffs[idx];
     }
   }
-  value *= std::log(composition.at(NUCID_235) / composition.at(NUCID_238));
+  value *= std::log(it_235->second / x_238);
 
   return value;
 }
@@ -348,27 +468,35 @@ double EnrichmentCalculator::ValueFunction_(
 void EnrichmentCalculator::CalculateConcentrations_() {
   // Variable naming follows E. von Halle, the equation numbers also refer
   // to his article.
-  std::map<int,double> e;
-  std::map<int,double> s;
-  for (int i : isotopes) {
-    // Eq. (37)
-    e[i] = 1. / alpha_star[i] 
-           / (1.-std::pow(alpha_star[i],-n_enriching));
-    // Eq. (39)
-    s[i] = 1. / alpha_star[i] 
-           / (std::pow(alpha_star[i], n_stripping+1.)-1.);
+  double sum_e = 0;
+  double sum_s = 0;
+  
+  // The product and tails compositions first hold the summands of the 
+  // right-hand sides of Eqs. (47) and (50) and are normalised afterwards.
+  // This avoids storing the cut factors in temporary containers. As
+  // e/(e+s) + s/(e+s) = 1, the tails summand follows from the product one.
+  for (int idx = 0; idx < isotopes.size(); idx++) {
+    int i = isotopes[idx];
+    double atom_frac = feed_fractions[idx];
+    double e;
+    double s;
+    CutFactors_(idx, e, s);
+    double product_summand = e * atom_frac / (e+s);
+    product_composition[i] = product_summand;
+    tails_composition[i] = atom_frac - product_summand;
+    sum_e += product_summand;
+    sum_s += atom_frac - product_summand;
   }
-
-  double sum_e;
-  double sum_s;
-  CalculateSums(sum_e, sum_s);
   
   // Calculate the compositions of product and tails.
   for (int i : isotopes) {
-    double atom_frac = MIsoFrac(feed_composition, i);
-    product_composition[i] = e[i] * atom_frac / (e[i]+s[i]) / sum_e;
-    tails_composition[i] = s[i] * atom_frac / (e[i]+s[i]) / sum_s;
+    product_composition[i] /= sum_e;
+    tails_composition[i] /= sum_s;
   }
+  sum_enriching = sum_e;
+  sum_stripping = sum_s;
+  concentrations_n_enriching = n_enriching;
+  concentrations_n_stripping = n_stripping;
 }
 
 // - - - - - - - - - - - - - - - - - - - - - - - - - - - - - - - - - - - -
@@ -396,11 +524,7 @@ void EnrichmentCalculator::Downblend_() {
     target_product_qty /= 1 + blend_feed_per_product;
     CalculateFlows_();
   } else if (cyclus::AlmostEq(feed_qty, TARGET_FEED_QTY)) {
-    double sum_e;
-    double sum_s;
-    CalculateSums(sum_e, sum_s);
-    
-    target_feed_qty /= 1 + blend_feed_per_product*sum_e;
+    target_feed_qty /= 1 + blend_feed_per_product*sum_enriching;
     CalculateFlows_();
   } 
   
@@ -411,11 +535,7 @@ void EnrichmentCalculator::Downblend_() {
   double blend_feed = blend_feed_per_product * product_qty;
   if (blend_feed+feed_qty > TARGET_FEED_QTY 
       && !cyclus::AlmostEq(blend_feed+feed_qty, TARGET_FEED_QTY)) {
-    double sum_e;
-    double sum_s;
-    CalculateSums(sum_e, sum_s);
-    
-    target_feed_qty /= 1 + blend_feed_per_product*sum_e;
+    target_feed_qty /= 1 + blend_feed_per_product*sum_enriching;
     CalculateFlows_();
     
     blend_feed = blend_feed_per_product * product_qty;
@@ -443,23 +563,17 @@ void EnrichmentCalculator::Downblend_() {
 } 
 
 // - - - - - - - - - - - - - - - - - - - - - - - - - - - - - - - - - - - -
-void EnrichmentCalculator::CalculateSums(double& sum_e, double& sum_s) {
+void EnrichmentCalculator::CutFactors_(int idx, double& e, double& s) {
   // Variable naming follows E. von Halle, the equation numbers also refer
   // to his article.
-  sum_e = 0;
-  sum_s = 0;
-  
-  for (int i : isotopes) {
-    double atom_frac = MIsoFrac(feed_composition, i);
-    // Eq. (37)
-    double e = 1. / alpha_star[i] 
-                  / (1-std::pow(alpha_star[i],-n_enriching));
-    // Eq. (39)
-    double s = 1. / alpha_star[i] 
-                  / (std::pow(alpha_star[i], n_stripping+1)-1);
-    sum_e += e * atom_frac / (e+s);  // right-hand side of Eq. (47)
-    sum_s += s * atom_frac / (e+s);  // right-hand side of Eq. (50)
-  }
+  // The powers of alpha_star are evaluated as exp(n*ln(alpha_star)) with
+  // the logarithm precalculated in CalculateGammaAlphaStar_.
+  const double a = alpha_star[idx];
+  const double log_a = log_alpha_star[idx];
+  // Eq. (37)
+  e = 1. / a / (1.-std::exp(-n_enriching*log_a));
+  // Eq. (39)
+  s = 1. / a / (std::exp((n_stripping+1.)*log_a)-1.);
 }
 
 }  // namespace misoenrichment
@@ -49,6 +49,8 @@ class EnrichmentCalculator {
   cyclus::CompMap feed_composition;
   cyclus::CompMap product_composition;
   cyclus::CompMap tails_composition;
+  // Uranium atom fractions of the feed in the order of 'isotopes'
+  std::vector<double> feed_fractions;
 
   double target_product_assay;
   double target_tails_assay;
@@ -64,21 +66,38 @@ class EnrichmentCalculator {
 
   const std::vector<int> isotopes;
   std::map<int,double> separation_factors;
-  std::map<int,double> alpha_star;
+  // Stored in the same order as 'isotopes' such that the stage
+  // calculations do not need any map lookups.
+  std::vector<double> alpha_star;
+  std::vector<double> log_alpha_star;
+  // Coefficients 1/(2k-1) of the value function in the order of 
+  // 'isotopes'. Isotopes with k = 0.5 use a logarithmic term instead.
+  std::vector<double> value_function_coeffs;
+  std::vector<bool> value_function_log_term;
 
   // Number of stages in the enriching and in the stripping section
   int n_enriching;
   int n_stripping;
+
+  // Sums of Eqs. (47) and (50) and the numbers of stages for which the
+  // product and tails compositions were last calculated
+  double sum_enriching;
+  double sum_stripping;
+  int concentrations_n_enriching;
+  int concentrations_n_stripping;
   
   double gamma_235;  // The overall separation factor for U-235
   
   void CalculateGammaAlphaStar_();
+  void CalculateFeedFractions_();
   void CalculateNStages_();
+  void MinimiseNStages_(int& n_stages, bool enriching);
+  bool TargetAssayReached_(bool enriching);
   void CalculateFlows_();
-  void CalculateSwu_();
+  void CalculateSwu_(double v_feed, double v_product, double v_tails);
   void CalculateConcentrations_();
   void Downblend_();
-  void CalculateSums(double& sum_e, double& sum_s);
+  void CutFactors_(int idx, double& e, double& s);
 
   double ValueFunction_(const cyclus::CompMap& composition);
 };
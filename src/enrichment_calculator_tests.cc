@@ -123,6 +123,39 @@ TEST_F(EnrichmentCalculatorTest, NumberStages) {
   EXPECT_EQ(expect_n_stripping, n_stripping);
 }
 
+// - - - - - - - - - - - - - - - - - - - - - - - - - - - - - - - - - - - -
+TEST_F(EnrichmentCalculatorTest, SetInput) {
+  // When reusing a calculator, the number of stages of the previous 
+  // cascade is used as a starting point. This must not alter the results.
+  EnrichmentCalculator fresh(compPtr_nat_U(), 0.05, 0.003, 1.3, 100,
+                             1e299, 1e299, false);
+  e.SetInput(compPtr_nat_U(), 0.05, 0.003, 100, 1e299, 1e299, 1.3, false);
+
+  cyclus::Composition::Ptr product_comp2, tails_comp2;
+  double feed_qty2, product_qty2, tails_qty2, swu_used2;
+  int n_enriching2, n_stripping2;
+  
+  fresh.EnrichmentOutput(product_comp, tails_comp, feed_qty, swu_used,
+                         product_qty, tails_qty, n_enriching, n_stripping);
+  e.EnrichmentOutput(product_comp2, tails_comp2, feed_qty2, swu_used2, 
+                     product_qty2, tails_qty2, n_enriching2, n_stripping2);
+  EXPECT_TRUE(misotest::CompareCompMap(product_comp2->atom(), 
+                                       product_comp->atom()));
+  EXPECT_DOUBLE_EQ(swu_used2, swu_used);
+  EXPECT_EQ(n_enriching2, n_enriching);
+  EXPECT_EQ(n_stripping2, n_stripping);
+
+  // Going back to the original input, which needs more stages.
+  e.SetInput(compPtr_nat_U(), 0.9, 0.001, 100, 1e299, 1e299, 1.3, false);
+  e.EnrichmentOutput(product_comp2, tails_comp2, feed_qty2, swu_used2, 
+                     product_qty2, tails_qty2, n_enriching2, n_stripping2);
+  EXPECT_TRUE(misotest::CompareCompMap(expect_product_comp, 
+                                       product_comp2->atom()));
+  EXPECT_NEAR(expect_swu_used, swu_used2, kEpsDouble);
+  EXPECT_EQ(expect_n_enriching, n_enriching2);
+  EXPECT_EQ(expect_n_stripping, n_stripping2);
+}
+
 // - - - - - - - - - - - - - - - - - - - - - - - - - - - - - - - - - - - -
 TEST_F(EnrichmentCalculatorTest, Downblending) {
   double target_product_assay = MIsoAssay(weapons_grade_U()) - 0.001;
@@ -635,8 +635,10 @@ void GprReactor::CompositionToOutFile_(cyclus::Composition::Ptr comp,
   json_object["power_output"] = power_output;  // in MWth
   json_object["irradiation_time"] = irradiation_time;  // in days
   json_object["burnup"] = burnup;  // Save JSON output in output file.
+  // The file is only read by spentfuelgpr and deleted right afterwards,
+  // hence it is written without indentation.
   std::ofstream file(out_fname, std::ofstream::out | std::ofstream::trunc);
-  file << std::setw(2) << json_object << "\n";
+  file << json_object << "\n";
   file.close();
 
   // Deleting the output file does not make sense except for unit tests to
@@ -665,12 +667,13 @@ cyclus::Composition::Ptr GprReactor::ImportSpentFuelComposition_(double qty) {
   file >> json_object;
   file.close();
 
-  try {
-    json_object.at("spent_fuel_composition");
-  } catch (const nlohmann::detail::out_of_range& e) {
+  // Look up the composition once instead of once per isotope below.
+  nlohmann::json::const_iterator composition = json_object.find(
+      "spent_fuel_composition");
+  if (composition == json_object.end()) {
     std::stringstream msg;
-    msg << "Cannot find key 'spent_fuel_composition' in '" << in_fname << "'."
-        << "\nException id: " << e.id;
+    msg << "Cannot find key 'spent_fuel_composition' in '" << in_fname
+        << "'.";
     throw cyclus::IOError(msg.str());
   }
 
@@ -684,14 +687,14 @@ cyclus::Composition::Ptr GprReactor::ImportSpentFuelComposition_(double qty) {
   double sum = 0;
 
   for (const int& nuc_id : relevant_spent_fuel_comps) {
-    try {
-      // Convert NucID to a human-readable string as used in the json file, for
-      // example: '922350001' is converted to 'U235M'.
-      std::string key = pyne::nucname::name(nuc_id);
-      mass = json_object.at("spent_fuel_composition").at(key);
-    } catch (const nlohmann::detail::out_of_range& e) {
+    // Convert NucID to a human-readable string as used in the json file, for
+    // example: '922350001' is converted to 'U235M'.
+    nlohmann::json::const_iterator it = composition->find(
+        pyne::nucname::name(nuc_id));
+    if (it == composition->end()) {
       continue;
     }
+    mass = it->get<double>();
     cm[nuc_id] = mass * fraction_of_core;
     sum += mass * fraction_of_core;
   }
@@ -285,10 +285,10 @@ cyclus::Material::Ptr MIsoEnrich::Offer_(
   double product_assay = MIsoAtomAssay(mat);
   double product_qty = mat->quantity();
  
-  EnrichmentCalculator e(feed_inv_comp[feed_idx], product_assay,
-                         tails_assay, gamma_235, feed_qty, product_qty,
-                         swu_capacity, use_downblending);
-  e.ProductOutput(product_comp, product_qty);
+  enrichment_calc.SetInput(feed_inv_comp[feed_idx], product_assay,
+                           tails_assay, feed_qty, product_qty, swu_capacity,
+                           gamma_235, use_downblending);
+  enrichment_calc.ProductOutput(product_comp, product_qty);
 
   return cyclus::Material::CreateUntracked(product_qty, product_comp);
 }
@@ -449,12 +449,13 @@ cyclus::Material::Ptr MIsoEnrich::Enrich_(
   double feed_qty = feed_inv[feed_idx].quantity();
   double product_assay = MIsoAtomAssay(mat);
   
-  // In the following line, the enrichment is calculated but it is not yet
-  // performed!
-  EnrichmentCalculator e(feed_inv_comp[feed_idx], product_assay,
-                         tails_assay, gamma_235, feed_qty, request_qty,
-                         swu_capacity, use_downblending);
-  e.EnrichmentOutput(product_comp, tails_comp, feed_required,
+  // In the following lines, the enrichment is calculated but it is not 
+  // yet performed! Reusing the calculator lets it start from the cascade
+  // designed for the previous offer or enrichment.
+  enrichment_calc.SetInput(feed_inv_comp[feed_idx], product_assay,
+                           tails_assay, feed_qty, request_qty, swu_capacity,
+                           gamma_235, use_downblending);
+  enrichment_calc.EnrichmentOutput(product_comp, tails_comp, feed_required,
                                    swu_required, product_qty, tails_qty,
                                    n_enriching, n_stripping);
   // Now, perform the enrichment by popping the feed and converting it to 
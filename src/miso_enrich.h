@@ -63,7 +63,12 @@ class FeedConverter : public cyclus::Converter<cyclus::Material> {
   FeedConverter(cyclus::Composition::Ptr feed_comp, double tails_assay,
                 double gamma_235, bool use_downblending)
       : feed_comp_(feed_comp), gamma_235_(gamma_235), 
-        tails_assay_(tails_assay), use_downblending(use_downblending) {}
+        tails_assay_(tails_assay), use_downblending(use_downblending) {
+    // 'convert' is called for every arc of the exchange, hence the set of
+    // uranium isotopes is only built once.
+    const std::vector<int>& isotopes = IsotopesNucID();
+    uranium_nucs_.insert(isotopes.begin(), isotopes.end());
+  }
 
   virtual ~FeedConverter() {}
 
@@ -79,9 +84,7 @@ class FeedConverter : public cyclus::Converter<cyclus::Material> {
     double feed_used = e.FeedUsed();
     
     cyclus::toolkit::MatQuery mq(m);
-    std::vector<int> isotopes(IsotopesNucID());
-    std::set<int> nucs(isotopes.begin(), isotopes.end());
-    double feed_uranium_frac = mq.atom_frac(nucs);
+    double feed_uranium_frac = mq.atom_frac(uranium_nucs_);
 
     return feed_used / feed_uranium_frac;
   }
@@ -103,6 +106,7 @@ class FeedConverter : public cyclus::Converter<cyclus::Material> {
   cyclus::Composition::Ptr feed_comp_;
   double gamma_235_;
   double tails_assay_;
+  std::set<int> uranium_nucs_;
 };
 
 /// @class MIsoEnrich
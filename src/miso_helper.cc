@@ -96,22 +96,28 @@ cyclus::Material::Ptr mat_natU() {
 }  // namespace misotest
 
 // - - - - - - - - - - - - - - - - - - - - - - - - - - - - - - - - - - - -
-const std::vector<int> IsotopesNucID() {
-  int iso[6] = {232, 233, 234, 235, 236, 238};
-  std::vector<int> isotopes(iso, iso + sizeof(iso)/sizeof(int));
-  for (int& i : isotopes) {
-    i = (92*1000 + i) * 10000;
-  } 
+// Mass numbers of the uranium isotopes considered in misoenrichment.
+const int kIsotopes[] = {232, 233, 234, 235, 236, 238};
+
+// - - - - - - - - - - - - - - - - - - - - - - - - - - - - - - - - - - - -
+// Returns the NucIDs corresponding to 'kIsotopes'. The vector is built 
+// only once such that frequently called functions, e.g., MIsoFrac, do not
+// need to recreate it.
+const std::vector<int>& IsotopesNucID() {
+  static const std::vector<int> isotopes = [] {
+    std::vector<int> nuc_ids;
+    for (int i : kIsotopes) {
+      nuc_ids.push_back(IsotopeToNucID(i));
+    }
+    return nuc_ids;
+  }();
   return isotopes;
 }
 
 // - - - - - - - - - - - - - - - - - - - - - - - - - - - - - - - - - - - -
 int IsotopeToNucID(int isotope) {
-  std::vector<int> isotopes = {232, 233, 234, 235, 236, 238};
-  std::vector<int>::iterator it;
-  
-  it = std::find(isotopes.begin(), isotopes.end(), isotope);
-  if (it == isotopes.end()) {
+  const int* end = kIsotopes + sizeof(kIsotopes)/sizeof(int);
+  if (std::find(kIsotopes, end, isotope) == end) {
     throw cyclus::ValueError("Invalid (non-uranium) isotope!");
   }
   return (92*1000 + isotope) * 10000;
@@ -119,11 +125,10 @@ int IsotopeToNucID(int isotope) {
 
 // - - - - - - - - - - - - - - - - - - - - - - - - - - - - - - - - - - - -
 int NucIDToIsotope(int nuc_id) {
-  std::vector<int> isotopes(IsotopesNucID());
-  std::vector<int>::iterator it;
+  const std::vector<int>& isotopes = IsotopesNucID();
   
-  it = std::find(isotopes.begin(), isotopes.end(), nuc_id);
-  if (it == isotopes.end()) {
+  if (std::find(isotopes.begin(), isotopes.end(), nuc_id) 
+      == isotopes.end()) {
     throw cyclus::ValueError("Invalid (non-uranium) isotope!");
   }
   return nuc_id/10000 - 92*1000;
@@ -191,13 +196,13 @@ double MIsoMassFrac(cyclus::Material::Ptr rsrc, int isotope) {
 }
 
 // - - - - - - - - - - - - - - - - - - - - - - - - - - - - - - - - - - - -
-double MIsoAssay(cyclus::CompMap compmap) {
+double MIsoAssay(const cyclus::CompMap& compmap) {
   return MIsoFrac(compmap, IsotopeToNucID(235));
 }
 
 // - - - - - - - - - - - - - - - - - - - - - - - - - - - - - - - - - - - -
-double MIsoFrac(cyclus::CompMap compmap, int isotope) {
-  std::vector<int> isotopes(IsotopesNucID());
+double MIsoFrac(const cyclus::CompMap& compmap, int isotope) {
+  const std::vector<int>& isotopes = IsotopesNucID();
   
   double isotope_assay = 0;
   double uranium_atom_frac = 0;
@@ -223,15 +228,15 @@ double MIsoFrac(cyclus::CompMap compmap, int isotope) {
 
 // - - - - - - - - - - - - - - - - - - - - - - - - - - - - - - - - - - - -
 std::map<int,double> CalculateSeparationFactor(double gamma_235) {
-  std::vector<int> isotopes(IsotopesNucID());
   std::map<int,double> separation_factors;
 
   // We consider U-238 to be the key component hence the mass differences
   // are calculated with respect to this isotope.
-  for (int i : isotopes) {
-    double delta_mass = 238. - NucIDToIsotope(i);
-    double gamma = 1. + delta_mass*(gamma_235-1.) / (238.-235.);
-    separation_factors[i] = gamma;
+  const double gamma_per_mass = (gamma_235-1.) / (238.-235.);
+  for (int i : kIsotopes) {
+    double delta_mass = 238. - i;
+    double gamma = 1. + delta_mass*gamma_per_mass;
+    separation_factors[IsotopeToNucID(i)] = gamma;
   }
   return separation_factors;
 }
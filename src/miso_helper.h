@@ -24,7 +24,7 @@ const double kEpsDouble = 1e-5;
 const double kEpsCompMap = 1e-5;
 const int kIterMax = 200;
 
-const std::vector<int> IsotopesNucID();
+const std::vector<int>& IsotopesNucID();
 int IsotopeToNucID(int isotope);
 int NucIDToIsotope(int nuc_id);
 int ResBufIdx(
@@ -44,8 +44,8 @@ double MIsoMassFrac(cyclus::Composition::Ptr composition,
                             int isotope);
 double MIsoMassFrac(cyclus::Material::Ptr rsrc, int isotope);
 
-double MIsoAssay(cyclus::CompMap compmap);
-double MIsoFrac(cyclus::CompMap compmap, int isotope);
+double MIsoAssay(const cyclus::CompMap& compmap);
+double MIsoFrac(const cyclus::CompMap& compmap, int isotope);
 
 // Calculates the stage separation factor for all isotopes starting from 
 // the given U235 overall separation factor.